@@ -4,7 +4,16 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
+import csv
+import json
+import re
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
 from datetime import datetime
 import os 
 
@@ -32,121 +41,413 @@ ROUTER_IPS = [
     "SKIP"           # Index 16 (Sim R16): Physical R4
 ]
 
+# Built once: sim index -> IP for routers actually on the court
+DEPLOYED_ROUTERS = {i: ip for i, ip in enumerate(ROUTER_IPS) if ip != "SKIP"}
+DUPLICATE_IPS = sorted(ip for ip, n in Counter(DEPLOYED_ROUTERS.values()).items() if n > 1)
+
 USERNAME = "OPTIC5G"
 PASSWORD = "bseceoptic5g"
 QUANTUM_MASK = "11111111111111111"
+MASK_BITS = bytes(c == "1" for c in QUANTUM_MASK)  # Parsed once: 1 = radio ON, 0 = radio OFF
+
+RF_LOG_PATH = os.path.join(os.path.expanduser('~'), 'Downloads', 'OPTIC5G_RF_Data.csv')
 
 # ==========================================
 # 2. SELENIUM CONFIGURATION
 # ==========================================
+HEADLESS = True  # Set False to watch the browsers while debugging selectors
+SHARE_ONE_CHROME = False  # True: one Chrome process, every pooled session works in its own tab
+CDP_PORT = 9222
+
+# Timeouts (seconds) per stage
+PAGE_LOAD_TIMEOUT_S = 10  # driver.get()
+PAGE_TIMEOUT_S = 8        # first element after a navigation
+RF_LOAD_TIMEOUT_S = 10    # live Signal/Noise/SNR numbers (used to be a blind 7s sleep)
+ELEMENT_TIMEOUT_S = 3     # elements on an already-rendered page
+
 def setup_driver():
     chrome_options = Options()
     chrome_options.add_argument("--ignore-certificate-errors") 
     chrome_options.add_argument("--incognito")
-    return webdriver.Chrome(options=chrome_options)
+    if HEADLESS:
+        # No window/compositor: roughly half the RAM per instance, so more fit in the pool
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1280,900")
+    # Only three <pre> fields matter, so skip image downloads entirely
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    # Return from driver.get() on DOMContentLoaded; the explicit waits handle the rest
+    chrome_options.page_load_strategy = "eager"
+    if SHARE_ONE_CHROME:
+        chrome_options.add_argument(f"--remote-debugging-port={CDP_PORT}")
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT_S) # Offline IP -> TimeoutException in 10s, not 300s
+    return driver
+
+def setup_attached_driver():
+    # Extra WebDriver session on the shared Chrome (no new browser process)
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{CDP_PORT}")
+    chrome_options.page_load_strategy = "eager"
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT_S)
+    return driver
+
+_tab_lock = threading.Lock()
+
+@contextmanager
+def isolated_tab(driver):
+    # Fresh tab in its own browser context, so router logins never share cookies
+    with _tab_lock:
+        context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        target_id = driver.execute_cdp_cmd("Target.createTarget",
+                                           {"url": "about:blank", "browserContextId": context_id})["targetId"]
+        driver.switch_to.window(target_id)
+    try:
+        yield driver
+    finally:
+        with _tab_lock:
+            driver.execute_cdp_cmd("Target.closeTarget", {"targetId": target_id})
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+
+# PharOS page locators (hoisted so every router reuses the same tuples)
+LOGIN_USER_LOC = (By.CSS_SELECTOR, "input[type='text']")
+LOGIN_PWD_LOC = (By.CSS_SELECTOR, "input[type='password']")
+# Status-page fields as CSS (same nodes as the old absolute XPaths, resolved by native querySelector)
+STATUS_PANEL_CSS = ("body > div:nth-of-type(1) > div > div:nth-of-type(3) > div > div:nth-of-type(4) > div"
+                    " > div:nth-of-type(2) > div:nth-of-type(2) > div > div")
+RF_VALUE_CSS = "div:nth-of-type(2) > div:nth-of-type(1) > span:nth-of-type(2) > pre"
+SIGNAL_LOC = (By.CSS_SELECTOR, f"{STATUS_PANEL_CSS} > div:nth-of-type(1) > div:nth-of-type(1) > {RF_VALUE_CSS}")
+NOISE_LOC = (By.CSS_SELECTOR, f"{STATUS_PANEL_CSS} > div:nth-of-type(2) > div:nth-of-type(2) > {RF_VALUE_CSS}")
+SNR_LOC = (By.CSS_SELECTOR, f"{STATUS_PANEL_CSS} > div:nth-of-type(3) > div:nth-of-type(2) > {RF_VALUE_CSS}")
+WIRELESS_TAB_LOC = (By.XPATH, "//a[contains(@class, 'nav-item') and contains(., 'Wireless')]")
+WIRELESS_LINK_LOC = (By.PARTIAL_LINK_TEXT, "Wireless")
+WL_CHECKBOX_LOC = (By.CSS_SELECTOR, "input[type='checkbox'][id*='wl-ap-enable-checkbox']")
+APPLY_LOC = (By.XPATH, "//span[contains(text(), 'Apply')]")
+
+# Reads several CSS-selected texts in one WebDriver round-trip
+READ_TEXTS_JS = """
+return arguments[0].map(s => { const n = document.querySelector(s); return n ? n.innerText.trim() : ""; });
+"""
+
+# Sets the radio checkbox to arguments[1] in one round-trip; returns [was_checked, now_checked]
+SET_RADIO_JS = """
+const box = arguments[0], want = arguments[1];
+const was = box.checked;
+if (was !== want) box.click();
+return [was, box.checked];
+"""
+
+# Signal/Noise/SNR are logged as plain numbers ("-65", "23.5"), without units
+RF_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+def parse_reading(text):
+    # Number from a page text like "-65 dBm"; None if there is none
+    match = RF_NUMBER_RE.search(text)
+    return float(match.group()) if match else None
 
 # ==========================================
 # 3. THE EXECUTION LOOP
 # ==========================================
+MAX_WORKERS = 16  # Routers processed concurrently (headless Chrome keeps this affordable)
+POOL_SIZE = MAX_WORKERS  # Max Chrome instances shared by the workers (launched on first lease)
+MAX_USES_PER_INSTANCE = 50  # Recycle a Chrome after this many router jobs
+
+class DriverPool:
+    """Lazily filled pool of Chrome drivers leased out one router job at a time."""
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES_PER_INSTANCE):
+        self.max_uses = max_uses
+        self._host = None
+        self._host_lock = threading.Lock()
+        # Slots start empty and fill on first lease. LIFO hands back the most recently
+        # returned (warm) driver first, so new Chromes are only launched when more
+        # routers run at once
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put((None, 0))
+
+    def _factory(self):
+        if not SHARE_ONE_CHROME:
+            return setup_driver()
+        with self._host_lock:
+            if self._host is None:
+                # One real browser; the pooled sessions attach to it over CDP
+                self._host = setup_driver()
+        return setup_attached_driver()
+
+    @contextmanager
+    def acquire(self):
+        # An empty slot is (None, 0); its Chrome is (re)launched here, inside the lease,
+        # so a failed launch is reported as this router's error and the slot still returns
+        driver, uses = self._idle.get()
+        healthy = False
+        try:
+            if driver is None:
+                try:
+                    driver = self._factory()
+                except Exception as e:
+                    print(f"   -> [POOL] Chrome failed to launch: {e}")
+                    raise
+            if SHARE_ONE_CHROME:
+                with isolated_tab(driver):
+                    yield driver
+            else:
+                yield driver
+            healthy = True
+        finally:
+            uses += 1
+            if driver is not None and (not healthy or uses >= self.max_uses):
+                # Retire crashed or worn-out instances; the next lease starts a fresh Chrome
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                driver = None
+            self._idle.put((driver, uses if driver is not None else 0))
+
+    def close(self):
+        while not self._idle.empty():
+            driver, _ = self._idle.get_nowait()
+            if driver is None:
+                continue
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if self._host is not None:
+            try:
+                self._host.quit()
+            except Exception:
+                pass
+
+# Last radio state this script set and applied per IP, so unchanged routers can skip Phase 2.
+# Not read back from the router: an Apply the router dropped, a reboot or a manual toggle
+# makes it stale, so only opt in for back-to-back sweeps on an otherwise untouched testbed.
+TRUST_CACHED_RADIO_STATE = False
+RADIO_STATE_PATH = os.path.join(os.path.expanduser('~'), 'optic5g_state.json')
+_radio_state = {}
+
+def load_radio_state():
+    try:
+        with open(RADIO_STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_radio_state():
+    with open(RADIO_STATE_PATH, "w") as f:
+        json.dump(_radio_state, f, indent=2)
+
+CSV_BUFFER_BYTES = 1 << 16
+APPLY_GUARD_S = 0.5
+RF_NO_READING = "--"  # Logged for a field without a number (e.g. Signal while the radio is OFF)
+
+def read_rf(driver, locators):
+    # Current Signal/Noise/SNR texts in one round-trip, as plain numbers or RF_NO_READING
+    texts = driver.execute_script(READ_TEXTS_JS, [css for _, css in locators])
+    values = [parse_reading(t) for t in texts]
+    return [RF_NO_READING if v is None else f"{v:g}" for v in values]
+
+def rf_readings_loaded(*locators):
+    # Wait condition: returns the readings once every field shows a live number
+    # (placeholders like "--" or "N/A" contain none)
+    def _predicate(driver):
+        readings = read_rf(driver, locators)
+        return False if RF_NO_READING in readings else readings
+    return _predicate
+
+def process_router(pool, i, target_ip, target_state):
+    router_label = f"Sim_Index_{i}"
+
+    print(f"\n[{router_label}] Accessing {target_ip}...")
+
+    try:
+        # A failure inside the lease also retires that Chrome instance
+        with pool.acquire() as driver:
+            return scrape_and_apply(driver, router_label, target_ip, target_state)
+    except WebDriverException as e:
+        # Router/browser failures only (includes Timeout/NoSuchElement); code bugs still raise
+        print(f"   -> [{router_label}] [FAILED] Error occurred at {target_ip}: {e}")
+        _radio_state.pop(target_ip, None)  # Radio state unknown now; never skip it on trust
+        return error_row(router_label, target_ip)
+
+def is_armored(target_ip, target_state):
+    return target_ip == "192.168.1.253" and target_state == 0
+
+def skip_phase2(router_label, target_ip, target_state):
+    if is_armored(target_ip, target_state):
+        print(f"   -> [{router_label}] [ARMOR ACTIVE] Access Point must stay ON.")
+        return True
+    if TRUST_CACHED_RADIO_STATE and _radio_state.get(target_ip) == target_state:
+        print(f"   -> [{router_label}] [UNCHANGED] Radio already {'ON' if target_state else 'OFF'}.")
+        return True
+    return False
+
+def error_row(router_label, target_ip):
+    return [router_label, target_ip, "ERROR", "ERROR", "ERROR", "Failed"]
+
+def format_row(router_label, target_ip, readings, target_state):
+    signal_value, noise_value, snr_value = readings
+    radio_text = 'ON' if target_state else 'OFF'
+    return [router_label, target_ip, signal_value, noise_value, snr_value, radio_text]
+
+def browser_login(driver, wait, target_ip):
+    driver.get(f"https://{target_ip}")
+    wait.until(EC.presence_of_element_located(LOGIN_USER_LOC)).send_keys(USERNAME)
+    pwd_box = driver.find_element(*LOGIN_PWD_LOC)
+    pwd_box.send_keys(PASSWORD)
+    pwd_box.send_keys(Keys.RETURN) 
+    # Logged in once the form is gone (independent of which Wireless locator this firmware matches)
+    wait.until(EC.invisibility_of_element_located(LOGIN_USER_LOC))
+
+def scrape_and_apply(driver, router_label, target_ip, target_state):
+    # Stage-sized waits so an offline router fails in seconds, not 15s per lookup
+    page_wait = WebDriverWait(driver, PAGE_TIMEOUT_S)
+    fast_wait = WebDriverWait(driver, ELEMENT_TIMEOUT_S)
+    rf_wait = WebDriverWait(driver, RF_LOAD_TIMEOUT_S)
+
+    # 1. NAVIGATE AND LOG IN (Enter-Key Bypass)
+    browser_login(driver, page_wait, target_ip)
+
+    # ==========================================
+    # PHASE 1: DATA GATHERING (STATUS TAB)
+    # ==========================================
+    print(f"   -> [{router_label}] Waiting for live RF load...")
+
+    # Poll until all three fields show live numbers instead of sleeping blind
+    try:
+        readings = rf_wait.until(rf_readings_loaded(SIGNAL_LOC, NOISE_LOC, SNR_LOC))
+        print(f"   -> [{router_label}] [DATA SAVED] SNR: {readings[2]}")
+    except TimeoutException:
+        # A radio switched OFF by an earlier mask never shows live numbers:
+        # log what the page has and still go on to the toggle
+        readings = read_rf(driver, (SIGNAL_LOC, NOISE_LOC, SNR_LOC))
+        print(f"   -> [{router_label}] [NO LIVE RF] Logged {readings} after {RF_LOAD_TIMEOUT_S}s")
+
+    row = format_row(router_label, target_ip, readings, target_state)
+
+    # ==========================================
+    # PHASE 2: MASK APPLICATION (WIRELESS TAB)
+    # ==========================================
+    if skip_phase2(router_label, target_ip, target_state):
+        return row
+
+    print(f"   -> [{router_label}] Transitioning to Wireless settings...")
+
+    # Double-Targeting XPath for the Wireless link (clickable = sidebar has settled)
+    try:
+        wireless_tab = fast_wait.until(EC.element_to_be_clickable(WIRELESS_TAB_LOC))
+    except TimeoutException:
+        wireless_tab = fast_wait.until(EC.presence_of_element_located(WIRELESS_LINK_LOC))
+    
+    # JS Click to bypass UI stalls
+    driver.execute_script("arguments[0].click();", wireless_tab)
+    
+    print(f"   -> [{router_label}] Waiting for Wireless page render...")
+    
+    # Manage Radio Checkbox using dynamic ID bypass (wait until the widget is interactive)
+    radio_checkbox = page_wait.until(EC.element_to_be_clickable(WL_CHECKBOX_LOC)) 
+
+    # Read state and toggle in a single round-trip, then confirm the box actually moved
+    want_on = bool(target_state)
+    was_on, now_on = driver.execute_script(SET_RADIO_JS, radio_checkbox, want_on)
+    if now_on != want_on:
+        raise WebDriverException(f"Radio checkbox stayed {'ON' if now_on else 'OFF'} after toggle")
+
+    if was_on and not want_on:
+        print(f"   -> [{router_label}] [ACTION] Radio Disabled.")
+    elif want_on and not was_on:
+        print(f"   -> [{router_label}] [ACTION] Radio Enabled.")
+
+    # Final Apply (wait until the button is enabled and visible, not just present)
+    apply_btn = fast_wait.until(EC.element_to_be_clickable(APPLY_LOC))
+    driver.execute_script("arguments[0].click();", apply_btn)
+    time.sleep(APPLY_GUARD_S) # Short guard so the Apply request leaves before the next navigation
+    print(f"   -> [{router_label}] [SUCCESS] Settings applied to {target_ip}")
+    _radio_state[target_ip] = target_state
+
+    return row
+
 def apply_quantum_mask_and_gather_data():
     if len(QUANTUM_MASK) != len(ROUTER_IPS):
         print(f"ERROR: Mask length does not match array length!")
         return
+    if set(QUANTUM_MASK) - {"0", "1"}:
+        print(f"ERROR: Mask may only contain '0' and '1'!")
+        return
+    if DUPLICATE_IPS:
+        print(f"ERROR: Duplicate router IPs in ROUTER_IPS: {', '.join(DUPLICATE_IPS)}")
+        return
 
-    driver = setup_driver()
-    wait = WebDriverWait(driver, 15)
-
-    downloads_folder = os.path.join(os.path.expanduser('~'), 'Downloads')
-    file_path = os.path.join(downloads_folder, 'OPTIC5G_RF_Data.csv')
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    with open(file_path, "a") as log_file:
-        log_file.write(f"\nTest Run:,{timestamp},Mask:,{QUANTUM_MASK}\n")
-        log_file.write("Router Label,IP Address,Signal,Noise,SNR,Radio Target\n")
-
-        for i in range(len(QUANTUM_MASK)):
-            target_ip = ROUTER_IPS[i]
-            target_state = QUANTUM_MASK[i]
-            router_label = f"Sim_Index_{i}" 
-            
-            if target_ip == "SKIP":
-                log_file.write(f"{router_label},NOT DEPLOYED,N/A,N/A,N/A,Skipping\n")
-                print(f"[{router_label}] Skipping.")
-                continue 
-
-            print(f"\n[{router_label}] Accessing {target_ip}...")
 
-            try:
-                # 1. NAVIGATE AND LOG IN (Enter-Key Bypass)
-                driver.get(f"https://{target_ip}")
-                wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='text']"))).send_keys(USERNAME)
-                pwd_box = driver.find_element(By.XPATH, "//input[@type='password']")
-                pwd_box.send_keys(PASSWORD)
-                pwd_box.send_keys(Keys.RETURN) 
-
-                # ==========================================
-                # PHASE 1: DATA GATHERING (STATUS TAB)
-                # ==========================================
-                print(f"   -> Waiting for live RF load...")
-                time.sleep(7) # Increased to ensure Signal numbers populate
-                
-                signal_xpath = "/html/body/div[1]/div/div[3]/div/div[4]/div/div[2]/div[2]/div/div/div[1]/div[1]/div[2]/div[1]/span[2]/pre"
-                noise_xpath = "/html/body/div[1]/div/div[3]/div/div[4]/div/div[2]/div[2]/div/div/div[2]/div[2]/div[2]/div[1]/span[2]/pre"
-                snr_xpath = "/html/body/div[1]/div/div[3]/div/div[4]/div/div[2]/div[2]/div/div/div[3]/div[2]/div[2]/div[1]/span[2]/pre"
-
-                signal_value = wait.until(EC.presence_of_element_located((By.XPATH, signal_xpath))).text
-                noise_value = wait.until(EC.presence_of_element_located((By.XPATH, noise_xpath))).text
-                snr_value = wait.until(EC.presence_of_element_located((By.XPATH, snr_xpath))).text
-
-                radio_text = 'ON' if target_state == '1' else 'OFF'
-                log_file.write(f"{router_label},{target_ip},{signal_value},{noise_value},{snr_value},{radio_text}\n")
-                print(f"   -> [DATA SAVED] SNR: {snr_value}")
-
-                # ==========================================
-                # PHASE 2: MASK APPLICATION (WIRELESS TAB)
-                # ==========================================
-                if target_ip == "192.168.1.253" and target_state == '0':
-                    print(f"   -> [ARMOR ACTIVE] Access Point must stay ON.")
-                    continue 
-
-                print(f"   -> Transitioning to Wireless settings...")
-                time.sleep(3) # Let the sidebar settle
-
-                # Double-Targeting XPath for the Wireless link
-                try:
-                    wireless_tab = wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'nav-item') and contains(., 'Wireless')]")))
-                except:
-                    wireless_tab = wait.until(EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Wireless")))
-                
-                # JS Click to bypass UI stalls
-                driver.execute_script("arguments[0].click();", wireless_tab)
-                
-                print(f"   -> Waiting for Wireless page render...")
-                time.sleep(5) # Crucial wait for the checkbox widget to load
-                
-                # Manage Radio Checkbox using dynamic ID bypass
-                radio_checkbox = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='checkbox' and contains(@id, 'wl-ap-enable-checkbox')]"))) 
-                is_checked = radio_checkbox.is_selected()
-
-                if target_state == '0' and is_checked:
-                    driver.execute_script("arguments[0].click();", radio_checkbox)
-                    print(f"   -> [ACTION] Radio Disabled.")
-                elif target_state == '1' and not is_checked:
-                    driver.execute_script("arguments[0].click();", radio_checkbox)
-                    print(f"   -> [ACTION] Radio Enabled.")
-
-                # Final Apply
-                apply_btn = wait.until(EC.element_to_be_clickable((By.XPATH, "//span[contains(text(), 'Apply')]")))
-                driver.execute_script("arguments[0].click();", apply_btn)
-                print(f"   -> [SUCCESS] Settings applied to {target_ip}")
-                time.sleep(4)
-
-            except Exception as e:
-                log_file.write(f"{router_label},{target_ip},ERROR,ERROR,ERROR,Failed\n")
-                print(f"   -> [FAILED] Error occurred at {target_ip}: {e}")
-
-    print(f"\n[COMPLETE] Results saved to: {file_path}")
-    driver.quit()
+    # Routers are independent, so sweep them concurrently.
+    # Workers return their CSV row; the main thread writes them in index order.
+    rows = [None] * len(QUANTUM_MASK)
+    skipped = [i for i in range(len(ROUTER_IPS)) if i not in DEPLOYED_ROUTERS]
+    if skipped:
+        print(f"Skipping undeployed indices: {skipped}")
+
+    _radio_state.update(load_radio_state())
+    first_error = None
+
+    def collect(future, i):
+        nonlocal first_error
+        try:
+            rows[i] = future.result()
+        except Exception as e:
+            # Keep collecting the other routers; this one gets an ERROR row and the
+            # exception is re-raised once the CSV block is on disk
+            print(f"   -> [Sim_Index_{i}] [FAILED] Unexpected error: {e!r}")
+            rows[i] = error_row(f"Sim_Index_{i}", DEPLOYED_ROUTERS[i])
+            _radio_state.pop(DEPLOYED_ROUTERS[i], None)
+            if first_error is None:
+                first_error = e
+
+    pool = DriverPool()
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    futures = {}
+    try:
+        futures = {
+            executor.submit(process_router, pool, i, target_ip, MASK_BITS[i]): i
+            for i, target_ip in DEPLOYED_ROUTERS.items()
+        }
+        for future in as_completed(futures):
+            collect(future, futures[future])
+    finally:
+        # On Ctrl-C: drop routers that have not started, let the running ones finish,
+        # then keep every row that completed (not just those collected before the interrupt)
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future, i in futures.items():
+            if rows[i] is None and future.done() and not future.cancelled():
+                collect(future, i)
+        # One buffered write for the whole run (csv.writer also handles quoting).
+        # Done first, so an interrupted sweep or a failing cleanup below still keeps the rows.
+        with open(RF_LOG_PATH, "a", newline="", buffering=CSV_BUFFER_BYTES) as log_file:
+            writer = csv.writer(log_file, lineterminator="\n")
+            writer.writerow([])
+            writer.writerow(["Test Run:", timestamp, "Mask:", QUANTUM_MASK])
+            writer.writerow(["Router Label", "IP Address", "Signal", "Noise", "SNR", "Radio Target"])
+            writer.writerows(row for row in rows if row is not None)
+            if skipped:
+                writer.writerow(["# SKIPPED:"] + skipped)
+            log_file.flush()
+            os.fsync(log_file.fileno())
+        try:
+            save_radio_state()
+        except OSError as e:
+            print(f"WARNING: Could not save radio state to {RADIO_STATE_PATH}: {e}")
+        try:
+            pool.close()
+        except Exception as e:
+            print(f"WARNING: Could not shut down Chrome cleanly: {e}")
+
+    print(f"\n[COMPLETE] Results saved to: {RF_LOG_PATH}")
+    if first_error is not None:
+        raise first_error
 
 if __name__ == "__main__":
     apply_quantum_mask_and_gather_data()
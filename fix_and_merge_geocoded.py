@@ -3,7 +3,7 @@ import re
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from pyproj import Transformer
+from geo_utils import load_towers, latlon_to_utm
 
 # Files
 clean_file = Path("data/manila_towers_clean.csv")
@@ -13,7 +13,7 @@ out_geo_fixed = Path("data/manila_towers_geocoded_fixed.csv")
 
 print(f"--> Reading source files...")
 try:
-    df_geo = pd.read_csv(geocoded_file)
+    df_geo = load_towers(geocoded_file, compact=False)  # Re-exported below, keep full precision
     # Read entire CSV as string to handle multi-columns
     df_clean = pd.read_csv(clean_file, dtype=str, keep_default_na=False, header=None)
 except FileNotFoundError as e:
@@ -105,9 +105,8 @@ if "longitude" not in df_final.columns: df_final.rename(columns={"lon": "longitu
 
 df_final = df_final.dropna(subset=['latitude', 'longitude'])
 
-# Convert to XY
-transformer = Transformer.from_crs("EPSG:4326", "EPSG:32651", always_xy=True)
-xs, ys = transformer.transform(df_final['longitude'].values, df_final['latitude'].values)
+# Convert to XY (UTM 51N; shared cached Transformer, contiguous float64 buffers)
+xs, ys = latlon_to_utm(df_final['longitude'].to_numpy(), df_final['latitude'].to_numpy())
 
 min_x, min_y = xs.min(), ys.min()
 df_final['x_m'] = xs - min_x + 500.0
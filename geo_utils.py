@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pyproj import Transformer
+
+# Optional GPU projection (RAPIDS cuProj); only worth it for very large tower sets
+try:
+    import cupy as cp
+    from cuproj import Transformer as GPUTransformer
+except ImportError:
+    GPUTransformer = None
+GPU_MIN_POINTS = 100_000
+
+WGS84 = "EPSG:4326"
+UTM_51N = "EPSG:32651"  # Manila
+WEB_MERCATOR = "EPSG:3857"  # Basemap tiles
+
+
+# ==========================================
+# SHARED, CACHED SETUP
+# ==========================================
+@lru_cache(maxsize=None)
+def get_transformer(src, dst):
+    # Building a Transformer (PROJ pipeline lookup) is the expensive part; do it once per CRS pair
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+# Column types for the tower CSVs, applied by the pyarrow parser itself (no astype copy).
+# Radio fields fit float32; lat/lon and projected x_m/y_m stay float64 because they feed
+# pyproj and the KD-trees, which both work in double precision.
+TOWER_DTYPES = {
+    "latitude": pa.float64(),
+    "longitude": pa.float64(),
+    "x_m": pa.float64(),
+    "y_m": pa.float64(),
+    "txpower_dbm": pa.float32(),
+    "frequency_ghz": pa.float32(),
+    "bandwidth_mhz": pa.float32(),
+}
+
+
+@lru_cache(maxsize=None)
+def _read_towers(path, compact):
+    if not compact:
+        return pd.read_csv(path, engine="pyarrow")
+    # Columns missing from a given CSV are simply not in the table
+    options = pa_csv.ConvertOptions(column_types=TOWER_DTYPES)
+    return pa_csv.read_csv(path, convert_options=options).to_pandas()
+
+
+def load_towers(path, compact=True):
+    # Parse each tower CSV once per process; callers get their own copy to mutate.
+    # compact=False keeps inferred float64 columns (for scripts that write them back out).
+    return _read_towers(str(path), compact).copy()
+
+
+def latlon_to_utm(lons, lats, dst=UTM_51N):
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    if GPUTransformer is not None and len(lons) >= GPU_MIN_POINTS:
+        # cuProj follows the EPSG:4326 authority axis order (lat, lon)
+        gpu_tx = GPUTransformer.from_crs(WGS84, dst)
+        xs, ys = gpu_tx.transform(cp.asarray(lats), cp.asarray(lons))
+        return cp.asnumpy(xs), cp.asnumpy(ys)
+    return get_transformer(WGS84, dst).transform(lons, lats)
@@ -1,14 +1,20 @@
-import pandas as pd
+import os
+import numpy as np
 import geopandas as gpd
+import matplotlib
+matplotlib.use('Agg')  # File output only; skip interactive backend setup
 import matplotlib.pyplot as plt
 import contextily as ctx
 from matplotlib.patches import Wedge, Circle
+from matplotlib.collections import PatchCollection
+from geo_utils import WEB_MERCATOR, WGS84, get_transformer, load_towers
 
 # ==========================================
 # 1. CONFIGURATION
 # ==========================================
 FILE_PATH = "data/manila_towers_geocoded_fixed.csv"
 OUTPUT_FILE = "data/optic5g_manila_zoom.png"
+BASEMAP_FILE = "data/manila_basemap.tif"  # Cached OSM tiles (delete to re-download)
 
 # 🔴 PASTE YOUR MASK STRING HERE
 PLOT_STRING = "100101010010000000000000101000001000100000000101000000000001000000000000000110000000000000000000000000000000000000000000000000001000000010000000000000100000000010000001000000001000000000000000000000000000000000000100000000001000000000000000000"
@@ -22,7 +28,7 @@ BEAM_WIDTH = 60
 # ==========================================
 print(f"--> Loading Data from {FILE_PATH}...")
 try:
-    df = pd.read_csv(FILE_PATH)
+    df = load_towers(FILE_PATH)
     print(f"--> Initial Data Rows: {len(df)}")
 except FileNotFoundError:
     print("❌ Error: Data file not found.")
@@ -40,12 +46,13 @@ if len(PLOT_STRING) != len(df):
     else:
         PLOT_STRING = PLOT_STRING.ljust(len(df), '0')
 
-df['status'] = [x for x in PLOT_STRING]
+# One vectorised pass over the mask bytes instead of a per-character str column
+is_active = np.frombuffer(PLOT_STRING.encode(), dtype=np.uint8) == ord('1')
 
-# Convert to Web Mercator (EPSG:3857)
-gdf = gpd.GeoDataFrame(
-    df, geometry=gpd.points_from_xy(df.longitude, df.latitude), crs="EPSG:4326"
-).to_crs(epsg=3857)
+# Convert to Web Mercator (EPSG:3857) with the shared cached Transformer
+merc_x, merc_y = get_transformer(WGS84, WEB_MERCATOR).transform(
+    df.longitude.to_numpy(dtype=float), df.latitude.to_numpy(dtype=float))
+gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(merc_x, merc_y), crs=WEB_MERCATOR)
 
 # ==========================================
 # 3. FORCED MANILA BOUNDS
@@ -71,37 +78,38 @@ fig, ax = plt.subplots(figsize=(fig_width, fig_height))
 # ==========================================
 # 4. PLOTTING
 # ==========================================
-active_towers = gdf[gdf['status'] == '1']
-inactive_towers = gdf[gdf['status'] == '0']
+active_towers = gdf[is_active]
+inactive_towers = gdf[~is_active]
 
 # A. Plot Inactive (Gray Dots)
-inactive_towers.plot(ax=ax, color='gray', alpha=0.3, markersize=30, zorder=1)
+inactive_towers.plot(ax=ax, color='gray', alpha=0.3, markersize=30, zorder=1, rasterized=True)
 
 # B. Plot Active Towers (Green Sectors) AND Count Visible
-visible_count = 0
-
-for idx, row in active_towers.iterrows():
-    # Check if inside View Box
-    if (row.geometry.x >= xlim[0] and row.geometry.x <= xlim[1] and 
-        row.geometry.y >= ylim[0] and row.geometry.y <= ylim[1]):
-        
-        visible_count += 1 
-        
-        x, y = row.geometry.x, row.geometry.y
-        azimuth = row['azimuth_deg']
-        
-        if pd.notna(azimuth):
-            center_angle = 90 - azimuth
-            wedge = Wedge((x, y), BEAM_RADIUS, center_angle - 30, center_angle + 30, 
-                          color='#00FF00', alpha=0.6, zorder=10)
-            ax.add_patch(wedge)
-            ax.scatter(x, y, c='black', s=80, zorder=11)
-        else:
-            circle = Circle((x, y), BEAM_RADIUS * 0.7, color='#00FF00', alpha=0.4, zorder=10)
-            ax.add_patch(circle)
-            ax.scatter(x, y, c='lime', edgecolors='black', s=150, zorder=11)
-
-        ax.text(x, y + 250, str(idx), fontsize=14, fontweight='bold', ha='center', zorder=15)
+# Pull coordinates out once and build all patches in one pass (no iterrows)
+xs = active_towers.geometry.x.to_numpy()
+ys = active_towers.geometry.y.to_numpy()
+azimuths = active_towers['azimuth_deg'].to_numpy(dtype=float)
+labels = active_towers.index.to_numpy()
+
+# Check if inside View Box
+in_view = (xs >= xlim[0]) & (xs <= xlim[1]) & (ys >= ylim[0]) & (ys <= ylim[1])
+visible_count = int(in_view.sum())
+
+sector = in_view & ~np.isnan(azimuths)
+omni = in_view & np.isnan(azimuths)
+
+center_angles = 90 - azimuths[sector]
+wedges = [Wedge((x, y), BEAM_RADIUS, a - 30, a + 30)
+          for x, y, a in zip(xs[sector], ys[sector], center_angles)]
+circles = [Circle((x, y), BEAM_RADIUS * 0.7) for x, y in zip(xs[omni], ys[omni])]
+
+ax.add_collection(PatchCollection(wedges, facecolor='#00FF00', edgecolor='#00FF00', alpha=0.6, zorder=10))
+ax.add_collection(PatchCollection(circles, facecolor='#00FF00', edgecolor='#00FF00', alpha=0.4, zorder=10))
+ax.scatter(xs[sector], ys[sector], c='black', s=80, zorder=11)
+ax.scatter(xs[omni], ys[omni], c='lime', edgecolors='black', s=150, zorder=11)
+
+for x, y, idx in zip(xs[in_view], ys[in_view], labels[in_view]):
+    ax.text(x, y + 250, str(idx), fontsize=14, fontweight='bold', ha='center', zorder=15)
 
 # Hack for Legend
 ax.scatter([], [], c='#00FF00', s=300, label='OPTIC-5G Active', edgecolor='black')
@@ -111,9 +119,13 @@ ax.set_xlim(xlim)
 ax.set_ylim(ylim)
 ax.set_axis_off()
 
-# Add Map Tiles
+# Add Map Tiles (downloaded once for the Manila view box, then read from disk)
 try:
-    ctx.add_basemap(ax, source=ctx.providers.OpenStreetMap.Mapnik)
+    if not os.path.exists(BASEMAP_FILE):
+        print(f"--> Caching basemap tiles to {BASEMAP_FILE}...")
+        ctx.bounds2raster(xlim[0], ylim[0], xlim[1], ylim[1], BASEMAP_FILE,
+                          source=ctx.providers.OpenStreetMap.Mapnik)
+    ctx.add_basemap(ax, source=BASEMAP_FILE, reset_extent=False)
 except Exception:
     print("⚠️ Warning: Could not download map tiles.")
 
@@ -124,5 +136,6 @@ plt.title(f"OPTIC-5G: Manila Focus\nActive: {visible_count} Visible (Total {tota
 plt.legend(loc='upper right', fontsize=15)
 
 plt.tight_layout()
-plt.savefig(OUTPUT_FILE, dpi=300, bbox_inches='tight', pad_inches=0.1)
+fig.savefig(OUTPUT_FILE, dpi=300, bbox_inches='tight', pad_inches=0.1)
+plt.close(fig)
 print(f"✅ Map Saved: {OUTPUT_FILE}")
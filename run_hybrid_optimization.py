@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from math import sqrt, exp
-import random
 import os
+import hashlib
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from geo_utils import load_towers
 
 from qiskit_optimization import QuadraticProgram
 
@@ -12,6 +13,7 @@ from qiskit_optimization import QuadraticProgram
 # ==========================================
 MASK_FILENAME = "optimized_mask.txt"
 FORCE_RERUN = True  # <--- I SET THIS TO TRUE SO IT RE-CALCULATES AUTOMATICALLY
+CACHE_DIR = "cache"  # Solver results keyed by input/QUBO hash (used when FORCE_RERUN is False)
 
 print("\n=== OPTIC-5G: HYBRID OPTIMIZATION (TUNED FOR HIGHER SINR) ====")
 
@@ -19,7 +21,7 @@ print("\n=== OPTIC-5G: HYBRID OPTIMIZATION (TUNED FOR HIGHER SINR) ====")
 # PHASE 1: DATA LOADING & GREEDY SELECTION
 # ==========================================
 try:
-    df = pd.read_csv("data/real_towers_ns3.csv")
+    df = load_towers("data/real_towers_ns3.csv")
     print(f"--> Loaded {len(df)} total towers.")
 except FileNotFoundError:
     print("❌ Error: 'data/real_towers_ns3.csv' not found.")
@@ -28,49 +30,48 @@ except FileNotFoundError:
 # Manual Blacklist
 MANUAL_BLACKLIST = [2, 185] 
 
-all_towers = df.to_dict('records')
-valid_towers = []
-
-for idx, t in enumerate(all_towers):
-    t['original_index'] = int(idx)
-    if 'txpower_dbm' not in t: t['txpower_dbm'] = 46.0
-    if t['original_index'] in MANUAL_BLACKLIST: continue 
-    valid_towers.append(t)
+# Tower attributes as parallel arrays indexed by original row position.
+# Coordinates stay float64 (cKDTree works in float64 anyway); powers only need float32.
+xs = df['x_m'].to_numpy(dtype=np.float64)
+ys = df['y_m'].to_numpy(dtype=np.float64)
+pwrs = df.get('txpower_dbm', pd.Series(46.0, index=df.index)).to_numpy(dtype=np.float32)
+valid_idx = np.setdiff1d(np.arange(len(df)), MANUAL_BLACKLIST)
 
 # Density Calculation
 DENSITY_RADIUS = 1000.0
-for t in valid_towers:
-    neighbor_count = 0
-    for other in valid_towers:
-        if t == other: continue
-        dist = sqrt((t['x_m'] - other['x_m'])**2 + (t['y_m'] - other['y_m'])**2)
-        if dist < DENSITY_RADIUS:
-            neighbor_count += 1
-    t['density_score'] = neighbor_count
+# Neighbour counts for every tower from one KD-tree radius query (minus the tower itself).
+# query_ball_point is inclusive, so step just below the radius to keep the strict '<' test.
+valid_xy = np.column_stack((xs[valid_idx], ys[valid_idx]))
+density_score = cKDTree(valid_xy).query_ball_point(
+    valid_xy, r=np.nextafter(DENSITY_RADIUS, 0), return_length=True) - 1
 
 # Greedy Filtering
 # INCREASED LIMIT slightly to give solver more options
 CANDIDATE_LIMIT = 28  
 MIN_SEPARATION = 300.0 
 
-sorted_towers = sorted(valid_towers, key=lambda x: x['density_score'], reverse=True)
-candidates = []
-candidate_indices = []
+# Densest first; the stable sort keeps ties in original order, as sorted(..., reverse=True) did
+sorted_towers = valid_idx[np.argsort(-density_score, kind='stable')]
+candidates = []  # Original row indices of the chosen towers
 
 print(f"--> Running Greedy Selection for {CANDIDATE_LIMIT} towers...")
 
+# Spatial index over the towers accepted so far (rebuilt per acceptance, at most CANDIDATE_LIMIT times)
+selected_xy = []
+selected_tree = None
+
 for tower in sorted_towers:
     if len(candidates) >= CANDIDATE_LIMIT:
         break
-    is_far_enough = True
-    for selected in candidates:
-        dist = sqrt((tower['x_m'] - selected['x_m'])**2 + (tower['y_m'] - selected['y_m'])**2)
-        if dist < MIN_SEPARATION:
-            is_far_enough = False
-            break
-    if is_far_enough:
-        candidates.append(tower)
-        candidate_indices.append(tower['original_index'])
+    xy = (xs[tower], ys[tower])
+    if selected_tree is not None:
+        # Finite only if some accepted tower lies within MIN_SEPARATION
+        nearest_dist, _ = selected_tree.query(xy, k=1, distance_upper_bound=MIN_SEPARATION)
+        if np.isfinite(nearest_dist):
+            continue
+    candidates.append(int(tower))
+    selected_xy.append(xy)
+    selected_tree = cKDTree(selected_xy)
 
 print(f"--> Selection Complete: {len(candidates)} Candidates Chosen.")
 
@@ -83,9 +84,6 @@ qp = QuadraticProgram()
 for i in range(len(candidates)):
     qp.binary_var(name=f"t_{i}")
 
-linear_terms = {}
-quadratic_terms = {}
-
 # --- TUNING PARAMETERS (THE FIX) ---
 # OLD: Reward=250, Penalty=200 --> Resulted in only 13 towers (Too sparse)
 # NEW: Reward=1800, Penalty=600 --> Should target ~18-22 towers (Sweet Spot)
@@ -94,78 +92,112 @@ INTERFERENCE_THRESHOLD = 1000.0 # Only penalize if VERY close
 PENALTY_WEIGHT = 600.0
 
 # Linear (Rewards)
-for i in range(len(candidates)):
-    # Reward is high, cost (TxPower) is low. Net positive to turn ON.
-    cost = candidates[i]['txpower_dbm'] - COVERAGE_REWARD
-    linear_terms[f"t_{i}"] = cost
-
-# Quadratic (Penalties)
-for i in range(len(candidates)):
-    for j in range(i + 1, len(candidates)):
-        t1 = candidates[i]
-        t2 = candidates[j]
-        dist = sqrt((t1['x_m'] - t2['x_m'])**2 + (t1['y_m'] - t2['y_m'])**2)
-        
-        if dist < INTERFERENCE_THRESHOLD:
-            quadratic_terms[(f"t_{i}", f"t_{j}")] = PENALTY_WEIGHT
-
-qp.minimize(linear=linear_terms, quadratic=quadratic_terms)
+# Reward is high, cost (TxPower) is low. Net positive to turn ON.
+linear = pwrs[candidates] - np.float32(COVERAGE_REWARD)
+
+# Quadratic (Penalties), kept as (qi, qj, qw) triplet arrays
+# All candidate pairs closer than the threshold in one KD-tree query (query_pairs is
+# inclusive, so step just below the threshold to keep the strict '<' test)
+candidate_xy = np.array(selected_xy)
+close_pairs = cKDTree(candidate_xy).query_pairs(
+    r=np.nextafter(INTERFERENCE_THRESHOLD, 0), output_type='ndarray')
+qi = close_pairs[:, 0].astype(np.int64)
+qj = close_pairs[:, 1].astype(np.int64)
+qw = np.full(len(close_pairs), PENALTY_WEIGHT, dtype=np.float32)
+
+# Upper-triangular sparse couplings (x_i * x_j weight at [i, j]); QuadraticProgram takes it as-is
+couplings = coo_matrix((qw, (qi, qj)), shape=(len(candidates), len(candidates)))
+qp.minimize(linear=linear, quadratic=couplings)
 
 # ==========================================
 # PHASE 3: SOLVER (Simulated Annealing)
 # ==========================================
-print("\n=== PHASE 3: SOLVER (Simulated Annealing) ===")
-
-def get_qubo_energy(solution_vec):
-    energy = 0
-    for i in range(len(solution_vec)):
-        if solution_vec[i] == 1:
-            energy += linear_terms.get(f"t_{i}", 0)
-    for (key, weight) in quadratic_terms.items():
-        i, j = int(key[0].split('_')[1]), int(key[1].split('_')[1])
-        if solution_vec[i] == 1 and solution_vec[j] == 1:
-            energy += weight
-    return energy
-
-iterations = 8000 # Increased iterations for better convergence
-temperature = 150.0
-cooling_rate = 0.99
-
-current_solution = [random.randint(0, 1) for _ in range(len(candidates))]
-current_energy = get_qubo_energy(current_solution)
-best_solution = list(current_solution)
-best_energy = current_energy
-
-for k in range(iterations):
-    idx = random.randint(0, len(candidates)-1)
-    new_solution = list(current_solution)
-    new_solution[idx] = 1 - new_solution[idx] 
-    
-    new_energy = get_qubo_energy(new_solution)
-    delta = new_energy - current_energy
-    
-    if delta < 0 or random.random() < exp(-delta / temperature):
-        current_solution = new_solution
-        current_energy = new_energy
-        if current_energy < best_energy:
-            best_energy = current_energy
-            best_solution = list(current_solution)
-    temperature *= cooling_rate
+print("\n=== PHASE 3: SOLVER (Parallel-Tempering Simulated Annealing) ===")
+
+N = len(candidates)
+
+# Flatten the QUBO once into a dense symmetric matrix: Q[i,i] = linear, Q[i,j] = Q[j,i] = w/2,
+# so E(s) = s @ Q @ s. At N <= 28 the whole matrix sits in L1 and a flip delta is one row dot.
+# float32 is plenty: weights are O(1e3) at ~0.1 dB resolution, far above single-precision error.
+Q = ((couplings + couplings.T) / 2).toarray().astype(np.float32)
+np.fill_diagonal(Q, linear)
+
+def parallel_tempering(Q, S, temperatures, n_steps, rng):
+    # S holds one replica per row; each step proposes one flip per replica and
+    # scores all of them at once from the gathered rows Q[idx] against S
+    B, n = S.shape
+    # Draw every proposal and acceptance roll up front in three calls to the generator
+    flip_idx = rng.integers(0, n, (n_steps, B))
+    accept_rolls = rng.random((n_steps, B))
+    swap_rolls = rng.random((n_steps, B // 2))
+    rows = np.arange(B)
+    diag = np.diag(Q)
+    betas = 1.0 / temperatures
+    E = np.einsum('bi,ij,bj->b', S, Q, S)
+    best = np.argmin(E)
+    best_state, best_energy = S[best].copy(), E[best]
+
+    for step in range(n_steps):
+        idx = flip_idx[step]
+        s_k = S[rows, idx]
+        # Energy change of flipping bit k: Q[k,k] + 2 * sum_{j != k} Q[k,j] * s_j, sign by s_k
+        row_dot = np.einsum('bj,bj->b', Q[idx], S)
+        field = 2.0 * (row_dot - diag[idx] * s_k) + diag[idx]
+        delta = np.where(s_k == 0, field, -field)
+
+        # Metropolis for every replica in parallel (clip so downhill moves don't overflow exp)
+        accept = accept_rolls[step] < np.exp(np.minimum(0.0, -delta / temperatures))
+        S[rows[accept], idx[accept]] ^= 1
+        E[accept] += delta[accept]
+
+        # Replica exchange between neighbouring temperatures (alternate even/odd pairs)
+        k = np.arange(step % 2, B - 1, 2)
+        log_p = (betas[k] - betas[k + 1]) * (E[k] - E[k + 1])
+        k = k[swap_rolls[step, :len(k)] < np.exp(np.minimum(0.0, log_p))]
+        lo, hi = np.concatenate([k, k + 1]), np.concatenate([k + 1, k])
+        S[lo], E[lo] = S[hi], E[hi]
+
+        b = np.argmin(E)
+        if E[b] < best_energy:
+            best_state, best_energy = S[b].copy(), E[b]
+    return best_state, best_energy
+
+REPLICAS = 64
+SA_SEED = 0 # Fixed seed: reruns (and the cached result) reproduce the same mask
+n_steps = 2000 # Every step advances all replicas, so far fewer steps than a single chain
+temperatures = np.geomspace(150.0, 0.5, REPLICAS) # Hot replicas explore, cold ones refine
+
+# Same towers + same QUBO + same solver settings -> same job; key the cached solve on all of it
+cache_key = hashlib.blake2b(
+    pd.util.hash_pandas_object(df).values.tobytes()
+    + np.array(candidates, dtype=np.int64).tobytes()
+    + Q.tobytes()
+    + str((REPLICAS, n_steps, temperatures.tolist(), SA_SEED)).encode(),
+    digest_size=8).hexdigest()
+cache_file = os.path.join(CACHE_DIR, f"{cache_key}.npz")
+
+if not FORCE_RERUN and os.path.exists(cache_file):
+    cached = np.load(cache_file)
+    best_solution, best_energy = cached['best_solution'], float(cached['best_energy'])
+    print(f"--> Reusing cached solution from {cache_file}")
+else:
+    rng = np.random.default_rng(SA_SEED)
+    initial_states = rng.integers(0, 2, (REPLICAS, N), dtype=np.int8)
+    best_solution, best_energy = parallel_tempering(Q, initial_states, temperatures, n_steps, rng)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(cache_file, best_solution=best_solution, best_energy=best_energy)
 
 # ==========================================
 # PHASE 4: OUTPUT
 # ==========================================
-final_mask_list = ['0'] * len(df)
-candidate_real_ids = [c['original_index'] for c in candidates]
-
-active_count = 0
-for i, val in enumerate(best_solution):
-    original_idx = candidate_real_ids[i]
-    if val == 1:
-        final_mask_list[original_idx] = '1'
-        active_count += 1
-
-final_mask_str = "".join(final_mask_list)
+# One ASCII byte per tower: '0' everywhere, '1' at the original index of each active candidate
+candidate_real_ids = np.array(candidates, dtype=np.int64)
+active = np.asarray(best_solution) == 1
+active_count = int(active.sum())
+
+mask_arr = np.full(len(df), ord('0'), dtype=np.uint8)
+mask_arr[candidate_real_ids[active]] = ord('1')
+final_mask_str = mask_arr.tobytes().decode('ascii')
 
 with open(MASK_FILENAME, "w") as f:
     f.write(final_mask_str)